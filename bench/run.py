@@ -0,0 +1,388 @@
+"""
+Headless benchmarks for the SimpleCov plugin.
+
+Runs the plugin outside Sublime Text against the stand-in `sublime` and
+`sublime_plugin` modules in `bench/stubs`, using synthetic `sublime.json`
+reports of various sizes, and writes the timings as JSON.  Pass the JSON of
+an earlier run to `--compare` to flag regressions.
+
+    python bench/run.py [--sizes small|full] [--files N --lines N]
+                        [--output bench_results.json] [--compare OLD.json]
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+PACKAGE = 'SimpleCov'
+SETTINGS_FILE = 'SimpleCov.sublime-settings'
+
+sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+
+import sublime  # noqa: E402  (the stand-in from bench/stubs)
+
+
+# (number of files, lines per file) of each generated report.
+SIZES = {
+    'small': [(1, 10), (100, 200), (1000, 200), (1, 10000)],
+    'full': [(1, 10), (100, 200), (1000, 200), (10000, 200), (50000, 200),
+             (1, 10000), (1, 100000)],
+}
+
+JSON_COLOR_SCHEME = 'Packages/Color Scheme - Default/Monokai.sublime-color-scheme'
+XML_COLOR_SCHEME = 'Packages/Color Scheme - Default/Monokai.tmTheme'
+
+
+def load_plugin():
+    """
+    Import the repository as the `SimpleCov` package and load its plugins the
+    way Sublime Text does, returning the imported plugin modules by name.
+    """
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[PACKAGE] = package
+
+    modules = {}
+    for filename in sorted(os.listdir(REPO_ROOT)):
+        name, ext = os.path.splitext(filename)
+        if ext != '.py':
+            continue
+        module = importlib.import_module('{}.{}'.format(PACKAGE, name))
+        if hasattr(module, 'plugin_loaded'):
+            module.plugin_loaded()
+        modules[name] = module
+    return modules
+
+
+def register_color_schemes(rules=200):
+    """ Register stand-in color schemes of a realistic size. """
+    json_rules = [
+        {'name': 'Rule {}'.format(i), 'scope': 'scope.rule.{}'.format(i), 'foreground': '#F8F8F2'}
+        for i in range(rules)
+    ]
+    sublime._resources[JSON_COLOR_SCHEME] = json.dumps(
+        {'name': 'Monokai', 'globals': {'background': '#272822'}, 'rules': json_rules}, indent=4)
+
+    xml_rules = ''.join(
+        '<dict><key>name</key><string>Rule {0}</string><key>scope</key>'
+        '<string>scope.rule.{0}</string><key>settings</key><dict><key>foreground</key>'
+        '<string>#F8F8F2</string></dict></dict>'.format(i)
+        for i in range(rules)
+    )
+    sublime._resources[XML_COLOR_SCHEME] = (
+        '<?xml version="1.0" encoding="UTF-8"?><plist version="1.0"><dict>'
+        '<key>name</key><string>Monokai</string><key>settings</key><array>'
+        '<dict><key>settings</key><dict><key>background</key><string>#272822</string></dict></dict>'
+        + xml_rules + '</array></dict></plist>'
+    )
+
+
+def generate_report(project_root, files, lines, seed=0):
+    """
+    Write a synthetic `coverage/sublime.json` with `files` files of `lines`
+    lines each, returning the absolute filenames in the report.
+    """
+    rng = random.Random(seed)
+    coverage_files = []
+    for i in range(files):
+        filename = os.path.join(project_root, 'lib', 'dir{}'.format(i % 100), 'file_{}.rb'.format(i))
+        line_coverage = []
+        for _ in range(lines):
+            kind = rng.random()
+            if kind < 0.3:
+                line_coverage.append(None)
+            elif kind < 0.45:
+                line_coverage.append(0)
+            else:
+                line_coverage.append(int(rng.expovariate(0.01)) + 1)
+
+        lines_of_code = sum(1 for hits in line_coverage if hits is not None)
+        covered_lines = sum(1 for hits in line_coverage if hits)
+        coverage_files.append({
+            'filename': filename,
+            'covered_percent': 100.0 * covered_lines / lines_of_code if lines_of_code else 100.0,
+            'coverage': line_coverage,
+            'covered_strength': 1.0,
+            'covered_lines': covered_lines,
+            'lines_of_code': lines_of_code,
+        })
+
+    covered_lines = sum(file['covered_lines'] for file in coverage_files)
+    lines_of_code = sum(file['lines_of_code'] for file in coverage_files)
+    report = {
+        'timestamp': 0,
+        'command_name': 'bench',
+        'files': coverage_files,
+        'metrics': {
+            'covered_percent': 100.0 * covered_lines / lines_of_code if lines_of_code else 100.0,
+            'covered_lines': covered_lines,
+            'total_lines': lines_of_code,
+        },
+    }
+
+    os.makedirs(os.path.join(project_root, 'coverage'), exist_ok=True)
+    with open(os.path.join(project_root, 'coverage', 'sublime.json'), 'w') as f:
+        json.dump(report, f)
+    return [file['filename'] for file in coverage_files]
+
+
+def make_view(window, filename, lines):
+    text = ''.join('  value_{0} = compute({0})\n'.format(i) for i in range(lines))
+    view = sublime.View(file_name=filename, text=text, window=window)
+    view.settings().set('color_scheme', JSON_COLOR_SCHEME)
+    return view
+
+
+def time_calls(func, number):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def measure(func, repeat, min_sample=0.01):
+    """
+    Time `func` like `timeit`: calls are batched until one batch takes at least
+    `min_sample` seconds, then `repeat` batches are timed.  Returns per-call
+    statistics in milliseconds.
+    """
+    number = 1
+    elapsed = time_calls(func, number)
+    while elapsed < min_sample and number < 100000:
+        number *= 10
+        elapsed = time_calls(func, number)
+
+    samples = [elapsed / number] + [time_calls(func, number) / number for _ in range(repeat - 1)]
+    samples = sorted(sample * 1000 for sample in samples)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_ms': samples[0],
+        'median_ms': samples[len(samples) // 2],
+        'mean_ms': sum(samples) / len(samples),
+        'max_ms': samples[-1],
+    }
+
+
+def get_benchmarks(modules, project_root, filenames, lines):
+    """ Return (name, callable) pairs exercising each of the plugin's hot paths. """
+    reader_module = importlib.import_module(PACKAGE + '.common.json_coverage_reader')
+    theme_module = importlib.import_module(PACKAGE + '.common.theme_generator')
+
+    window = sublime.Window(folders=[project_root])
+    sublime._active_window = window
+    target = filenames[0]
+    view = make_view(window, target, lines)
+    window._views.append(view)
+
+    settings = sublime.load_settings(SETTINGS_FILE)
+    cache_dir = os.path.join(sublime.cache_path(), PACKAGE)
+
+    def load_with_worker_min_size(min_size, keep_compact):
+        default_min_size = settings.get('report_worker_min_size')
+        settings.set('report_worker_min_size', min_size)
+        try:
+            if not keep_compact and os.path.isdir(cache_dir):
+                for filename in os.listdir(cache_dir):
+                    if filename.startswith('report-'):
+                        os.remove(os.path.join(cache_dir, filename))
+            reader_module._reports.clear()
+            reader_module.JsonCoverageReader(target)
+        finally:
+            settings.set('report_worker_min_size', default_min_size)
+
+    def load_cold():
+        load_with_worker_min_size(None, keep_compact=False)
+
+    def load_worker():
+        load_with_worker_min_size(0, keep_compact=False)
+
+    def load_compact():
+        load_with_worker_min_size(0, keep_compact=True)
+
+    def load_warm():
+        reader_module.JsonCoverageReader(target)
+
+    sample = random.Random(1).sample(filenames, min(100, len(filenames)))
+    reader = reader_module.JsonCoverageReader(target)
+
+    def lookup():
+        for filename in sample:
+            reader.get_file_coverage(filename)
+
+    listener = modules['ruby_coverage_status'].RubyCoverageStatusListener()
+    listener.view = view
+
+    def status():
+        listener.update_status()
+
+    toggle_command = modules['toggle_ruby_coverage'].ToggleRubyCoverageCommand(view)
+
+    def toggle():
+        toggle_command.run(None)
+        toggle_command.run(None)
+
+    def toggle_gutter():
+        settings.set('render_mode', 'gutter')
+        try:
+            toggle()
+        finally:
+            settings.set('render_mode', 'background')
+
+    panel_command = modules['show_project_ruby_coverage'].ShowProjectRubyCoverage(view)
+
+    def panel():
+        panel_command.run(None)
+
+    def theme(color_scheme):
+        def generate():
+            view.settings().set('color_scheme', color_scheme)
+            generator = theme_module.ThemeGenerator.for_view(view)
+            generator.add_scoped_style('Bench Uncovered', 'bench.uncovered', background='#A83732')
+            generator.add_scoped_style('Bench Covered', 'bench.covered', background='#287020')
+            generator.apply_new_theme('bench', view)
+            view.settings().set('color_scheme', JSON_COLOR_SCHEME)
+        return generate
+
+    return [
+        ('load_cold', load_cold),
+        ('load_worker', load_worker),
+        ('load_compact', load_compact),
+        ('load_warm', load_warm),
+        ('lookup_x{}'.format(len(sample)), lookup),
+        ('status', status),
+        ('toggle', toggle),
+        ('toggle_gutter', toggle_gutter),
+        ('panel', panel),
+        ('theme_json', theme(JSON_COLOR_SCHEME)),
+        ('theme_xml', theme(XML_COLOR_SCHEME)),
+    ]
+
+
+def run(sizes, repeat, with_stats):
+    work_dir = tempfile.mkdtemp(prefix='simplecov-bench-')
+    sublime._packages_path = os.path.join(work_dir, 'Packages')
+    sublime._installed_packages_path = os.path.join(work_dir, 'Installed Packages')
+    sublime._cache_path = os.path.join(work_dir, 'Cache')
+    os.makedirs(sublime._packages_path)
+    os.makedirs(sublime._installed_packages_path)
+    os.makedirs(sublime._cache_path)
+    sublime.register_settings_defaults(SETTINGS_FILE, os.path.join(REPO_ROOT, SETTINGS_FILE))
+    sublime.load_settings(SETTINGS_FILE).set('performance_stats', with_stats)
+    sublime.load_settings(SETTINGS_FILE).set('report_worker_python', sys.executable)
+    register_color_schemes()
+
+    try:
+        start = time.perf_counter()
+        modules = load_plugin()
+        load_ms = (time.perf_counter() - start) * 1000
+        perf = importlib.import_module(PACKAGE + '.common.perf')
+        print('plugin load {:.3f} ms'.format(load_ms))
+
+        results = [{
+            'files': 0, 'lines': 0, 'report_bytes': 0, 'benchmark': 'plugin_load', 'number': 1,
+            'repeat': 1, 'min_ms': load_ms, 'median_ms': load_ms, 'mean_ms': load_ms, 'max_ms': load_ms,
+        }]
+        for files, lines in sizes:
+            project_root = os.path.join(work_dir, 'project-{}x{}'.format(files, lines))
+            start = time.perf_counter()
+            filenames = generate_report(project_root, files, lines)
+            report_size = os.path.getsize(os.path.join(project_root, 'coverage', 'sublime.json'))
+            print('{} files x {} lines ({:.1f} MB, generated in {:.1f}s)'.format(
+                files, lines, report_size / 1e6, time.perf_counter() - start))
+
+            perf.reset()
+            for name, func in get_benchmarks(modules, project_root, filenames, lines):
+                result = measure(func, repeat)
+                result.update({'files': files, 'lines': lines, 'report_bytes': report_size, 'benchmark': name})
+                results.append(result)
+                print('  {:<16} {:>10.3f} ms  (median of {} x {})'.format(
+                    name, result['median_ms'], result['repeat'], result['number']))
+
+            if with_stats:
+                print(perf.format_stats())
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def result_key(result):
+    return (result['files'], result['lines'], result['benchmark'])
+
+
+def compare(results, previous_results, threshold):
+    """ Print changes against an earlier run, returning the number of regressions. """
+    previous = dict((result_key(result), result) for result in previous_results)
+    regressions = 0
+    print('\nCompared with previous run (threshold {:.0f}%):'.format(threshold * 100))
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old['median_ms']:
+            continue
+        ratio = result['median_ms'] / old['median_ms']
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            marker = '  improvement'
+        print('  {:>6} x {:<7} {:<16} {:>10.3f} -> {:>10.3f} ms ({:+.0f}%){}'.format(
+            result['files'], result['lines'], result['benchmark'],
+            old['median_ms'], result['median_ms'], (ratio - 1) * 100, marker))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the SimpleCov plugin headlessly.')
+    parser.add_argument('--sizes', choices=sorted(SIZES), default='small',
+                        help='preset list of report sizes to benchmark (default: small)')
+    parser.add_argument('--files', type=int, help='benchmark a single report with this many files')
+    parser.add_argument('--lines', type=int, default=200, help='lines per file with --files (default: 200)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed batches per benchmark (default: 5)')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the JSON results')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: 0.1)')
+    parser.add_argument('--with-stats', action='store_true',
+                        help='enable the plugin\'s performance stats and print them per report')
+    args = parser.parse_args(argv)
+
+    sizes = [(args.files, args.lines)] if args.files else SIZES[args.sizes]
+    results = run(sizes, max(1, args.repeat), args.with_stats)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'results': results,
+        }, f, indent=2)
+    print('\nWrote {}'.format(args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
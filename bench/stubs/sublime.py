@@ -0,0 +1,388 @@
+"""
+A minimal in-process stand-in for Sublime Text's `sublime` module, with just
+enough behaviour to drive the SimpleCov plugin from the benchmark harness.
+"""
+
+from bisect import bisect_right
+from fnmatch import fnmatch
+import json
+import os
+import re
+
+
+ENCODED_POSITION = 1
+TRANSIENT = 4
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+PERSISTENT = 16
+DRAW_OUTLINED = 32
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+HIDDEN = 128
+
+# The directories standing in for the installation's Packages and Cache
+# directories; set by the harness before the plugin is used.
+_packages_path = None
+_installed_packages_path = None
+_cache_path = None
+
+# Resources that are not on disk under `_packages_path`, keyed by their
+# "Packages/..." path.
+_resources = {}
+
+_settings_files = {}
+_settings_defaults = {}
+_active_window = None
+
+
+def version():
+    return '3211'
+
+
+def packages_path():
+    return _packages_path
+
+
+def installed_packages_path():
+    return _installed_packages_path
+
+
+def cache_path():
+    return _cache_path
+
+
+def _resource_file(path):
+    if path.startswith('Packages/') and _packages_path:
+        return os.path.join(_packages_path, *path.split('/')[1:])
+
+
+def load_resource(path):
+    if path in _resources:
+        return _resources[path]
+    filename = _resource_file(path)
+    if filename and os.path.isfile(filename):
+        with open(filename, encoding='utf-8') as f:
+            return f.read()
+    raise IOError('resource not found: {}'.format(path))
+
+
+def load_binary_resource(path):
+    return load_resource(path).encode('utf-8')
+
+
+def find_resources(pattern):
+    found = [path for path in _resources if fnmatch(os.path.basename(path), pattern)]
+    if _packages_path:
+        for directory, _, files in os.walk(_packages_path):
+            for filename in files:
+                if fnmatch(filename, pattern):
+                    relative = os.path.relpath(os.path.join(directory, filename), _packages_path)
+                    found.append('Packages/' + relative.replace(os.sep, '/'))
+    return sorted(found)
+
+
+def decode_value(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'^\s*//.*$', '', text, flags=re.M)
+    return json.loads(text)
+
+
+def encode_value(value, pretty=False):
+    return json.dumps(value, indent=4 if pretty else None)
+
+
+def register_settings_defaults(name, filename):
+    """ Use the contents of a `.sublime-settings` file as defaults for `name`. """
+    with open(filename, encoding='utf-8') as f:
+        _settings_defaults[name] = decode_value(f.read())
+    _settings_files.pop(name, None)
+
+
+def load_settings(name):
+    settings = _settings_files.get(name)
+    if settings is None:
+        settings = _settings_files[name] = Settings(_settings_defaults.get(name, {}))
+    return settings
+
+
+def save_settings(name):
+    pass
+
+
+def status_message(message):
+    pass
+
+
+def ok_cancel_dialog(message, ok_title=''):
+    return False
+
+
+def message_dialog(message):
+    pass
+
+
+def set_timeout(callback, delay=0):
+    callback()
+
+
+def set_timeout_async(callback, delay=0):
+    callback()
+
+
+def active_window():
+    return _active_window
+
+
+def windows():
+    return [_active_window] if _active_window else []
+
+
+class Region:
+    __slots__ = ('a', 'b', 'xpos')
+
+    def __init__(self, a, b=None, xpos=-1):
+        self.a = a
+        self.b = a if b is None else b
+        self.xpos = xpos
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+    def __repr__(self):
+        return 'Region({}, {})'.format(self.a, self.b)
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return abs(self.b - self.a)
+
+    def empty(self):
+        return self.a == self.b
+
+    def contains(self, point):
+        return self.begin() <= point <= self.end()
+
+
+class Settings:
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+        self._callbacks = {}
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+        for callback in list(self._callbacks.values()):
+            callback()
+
+    def has(self, key):
+        return key in self._values
+
+    def erase(self, key):
+        self._values.pop(key, None)
+
+    def add_on_change(self, key, callback):
+        self._callbacks[key] = callback
+
+    def clear_on_change(self, key):
+        self._callbacks.pop(key, None)
+
+
+class Selection:
+    def __init__(self, regions=None):
+        self._regions = list(regions or [Region(0)])
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __getitem__(self, i):
+        return self._regions[i]
+
+    def __iter__(self):
+        return iter(self._regions)
+
+    def clear(self):
+        self._regions = []
+
+    def add(self, region):
+        self._regions.append(region)
+
+
+class View:
+    """
+    A text buffer with line offsets precomputed, so point/row conversions are
+    a bisect and do not dominate the plugin's own timings.
+    """
+
+    def __init__(self, file_name=None, text='', window=None, scope='source.ruby',
+                 viewport_extent=(1200.0, 800.0), em_width=8.0):
+        self._file_name = file_name
+        self._window = window
+        self._scope = scope
+        self._viewport_extent = viewport_extent
+        self._em_width = em_width
+        self._settings = Settings({
+            'color_scheme': 'Packages/Color Scheme - Default/Monokai.sublime-color-scheme',
+        })
+        self._regions = {}
+        self._status = {}
+        self._sel = Selection()
+        self._set_text(text)
+
+    def _set_text(self, text):
+        self._text = text
+        self._line_starts = [0]
+        position = text.find('\n')
+        while position != -1:
+            self._line_starts.append(position + 1)
+            position = text.find('\n', position + 1)
+
+    def id(self):
+        return id(self)
+
+    def file_name(self):
+        return self._file_name
+
+    def window(self):
+        return self._window
+
+    def settings(self):
+        return self._settings
+
+    def scope_name(self, point):
+        return self._scope + ' '
+
+    def size(self):
+        return len(self._text)
+
+    def substr(self, region):
+        if isinstance(region, Region):
+            return self._text[region.begin():region.end()]
+        return self._text[region:region + 1]
+
+    def text_point(self, row, col):
+        row = max(0, min(row, len(self._line_starts) - 1))
+        return min(self._line_starts[row] + col, len(self._text))
+
+    def rowcol(self, point):
+        row = bisect_right(self._line_starts, point) - 1
+        return row, point - self._line_starts[row]
+
+    def line(self, x):
+        region = self.full_line(x)
+        end = region.b - 1 if self._text[region.a:region.b].endswith('\n') else region.b
+        return Region(region.a, end)
+
+    def full_line(self, x):
+        point = x.begin() if isinstance(x, Region) else x
+        row = self.rowcol(point)[0]
+        if row + 1 < len(self._line_starts):
+            return Region(self._line_starts[row], self._line_starts[row + 1])
+        return Region(self._line_starts[row], len(self._text))
+
+    def sel(self):
+        return self._sel
+
+    def show(self, x, show_surrounds=True):
+        pass
+
+    def show_at_center(self, x):
+        pass
+
+    def viewport_extent(self):
+        return self._viewport_extent
+
+    def em_width(self):
+        return self._em_width
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        self._regions[key] = (list(regions), scope, icon, flags)
+
+    def get_regions(self, key):
+        return list(self._regions.get(key, ([],))[0])
+
+    def erase_regions(self, key):
+        self._regions.pop(key, None)
+
+    def set_status(self, key, value):
+        self._status[key] = value
+
+    def get_status(self, key):
+        return self._status.get(key, '')
+
+    def erase_status(self, key):
+        self._status.pop(key, None)
+
+    def set_read_only(self, read_only):
+        pass
+
+    def erase(self, edit, region):
+        self._set_text(self._text[:region.begin()] + self._text[region.end():])
+
+    def insert(self, edit, point, text):
+        self._set_text(self._text[:point] + text + self._text[point:])
+        return len(text)
+
+    def run_command(self, command, args=None):
+        pass
+
+
+class Window:
+    def __init__(self, folders=None):
+        self._folders = list(folders or [])
+        self._panels = {}
+        self._views = []
+        self._active_panel = None
+
+    def id(self):
+        return id(self)
+
+    def folders(self):
+        return self._folders
+
+    def create_output_panel(self, name, unlisted=False):
+        panel = self._panels.get(name)
+        if panel is None:
+            panel = self._panels[name] = View(window=self, scope='text.plain')
+        return panel
+
+    def find_output_panel(self, name):
+        return self._panels.get(name)
+
+    def find_open_file(self, filename):
+        for view in self._views:
+            if view.file_name() == filename:
+                return view
+
+    def open_file(self, filename, flags=0):
+        if flags & ENCODED_POSITION:
+            filename = filename.split(':')[0]
+        view = self.find_open_file(filename)
+        if view is None:
+            view = View(file_name=filename, window=self)
+            self._views.append(view)
+        return view
+
+    def views(self):
+        return list(self._views)
+
+    def active_panel(self):
+        return self._active_panel
+
+    def run_command(self, command, args=None):
+        if command == 'show_panel':
+            self._active_panel = args['panel']
+        elif command == 'hide_panel':
+            self._active_panel = None
+
+    def status_message(self, message):
+        pass
@@ -0,0 +1,37 @@
+"""
+A minimal in-process stand-in for Sublime Text's `sublime_plugin` module.
+"""
+
+
+class Command:
+    def is_enabled(self, *args, **kwargs):
+        return True
+
+    def is_visible(self, *args, **kwargs):
+        return True
+
+    def is_checked(self, *args, **kwargs):
+        return False
+
+
+class ApplicationCommand(Command):
+    pass
+
+
+class WindowCommand(Command):
+    def __init__(self, window):
+        self.window = window
+
+
+class TextCommand(Command):
+    def __init__(self, view):
+        self.view = view
+
+
+class EventListener:
+    pass
+
+
+class ViewEventListener:
+    def __init__(self, view):
+        self.view = view
@@ -0,0 +1,103 @@
+"""
+Runs of consecutive lines ("bands") that share a coverage level.  Bands are
+computed once per file and report version and shared by every way of
+rendering coverage in a view.
+"""
+
+from collections import defaultdict
+
+from .coverage_diff import get_coverage_diff
+from .heatmap import get_heat_level, get_heat_thresholds
+from .perf import record_cache
+
+
+MYPY = False
+if MYPY:
+    from typing import Callable, DefaultDict, Dict, List, Optional, Set, Tuple
+
+
+if '_bands' not in globals():
+    _bands = {}  # type: Dict[Tuple[str, str], Tuple[tuple, Dict[str, List[Tuple[int, int]]]]]
+
+
+def get_line_level(hits, coverage_levels):
+    # type: (int, Dict[str, int]) -> str
+    if hits >= coverage_levels['most_covered']:
+        return 'most_covered'
+    if hits >= coverage_levels['more_covered']:
+        return 'more_covered'
+    if hits >= coverage_levels['covered']:
+        return 'covered'
+    return 'uncovered'
+
+
+def get_heat_level_name(hits, heat_thresholds, heat_levels):
+    # type: (int, List[int], int) -> str
+    if hits == 0:
+        return 'uncovered'
+    return 'heat_{}'.format(get_heat_level(hits, heat_thresholds, heat_levels))
+
+
+def find_coverage_bands(line_coverage, get_level, regressed_rows=frozenset(), gained_rows=frozenset()):
+    # type: (List[Optional[int]], Callable[[int], str], Set[int], Set[int]) -> DefaultDict[str, List[Tuple[int, int]]]
+    """
+    Return the (first row, last row) of each band, keyed by the coverage level
+    `get_level` gives for a line's hit count, or by `regressed` and `gained`
+    for lines that lost or gained coverage.  Lines that are not executable
+    end a band.
+    """
+    bands = defaultdict(list)  # type: DefaultDict[str, List[Tuple[int, int]]]
+    current_level = None  # type: Optional[str]
+    start = 0
+    for row, hits in enumerate(line_coverage):
+        if hits is None:
+            level = None
+        elif row in regressed_rows:
+            level = 'regressed'
+        elif row in gained_rows:
+            level = 'gained'
+        else:
+            level = get_level(hits)
+
+        if level != current_level:
+            if current_level is not None:
+                bands[current_level].append((start, row - 1))
+            current_level = level
+            start = row
+
+    if current_level is not None:
+        bands[current_level].append((start, len(line_coverage) - 1))
+    return bands
+
+
+def get_coverage_bands(reader, filename, coverage, coverage_levels, heat_levels=None):
+    # type: (JsonCoverageReader, str, dict, Dict[str, int], Optional[int]) -> DefaultDict[str, List[Tuple[int, int]]]
+    """
+    Return the bands of a file in the reader's report, computing them on first
+    use.  Covered lines are split into `heat_levels` adaptive `heat_{n}`
+    levels if given, and by the static `coverage_levels` otherwise.
+    """
+    diff = get_coverage_diff(reader)
+    heat_thresholds = get_heat_thresholds(reader, heat_levels) if heat_levels else None
+    key = (
+        reader.report.version,
+        diff.version if diff else None,
+        tuple(sorted(coverage_levels.items())),
+        heat_levels,
+        tuple(heat_thresholds) if heat_thresholds is not None else None,
+    )
+    cached = _bands.get((reader.report.filename, filename))
+    record_cache('coverage_bands', cached is not None and cached[0] == key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    regressed_rows = set(diff.regressed_rows(filename)) if diff else set()
+    gained_rows = set(diff.gained_rows(filename)) if diff else set()
+    if heat_thresholds is None:
+        get_level = lambda hits: get_line_level(hits, coverage_levels)
+    else:
+        get_level = lambda hits: get_heat_level_name(hits, heat_thresholds, heat_levels)
+
+    bands = find_coverage_bands(coverage['coverage'], get_level, regressed_rows, gained_rows)
+    _bands[(reader.report.filename, filename)] = (key, bands)
+    return bands
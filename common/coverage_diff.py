@@ -0,0 +1,86 @@
+"""
+Compare the current coverage report with the one loaded before it, to find
+the lines that lost or gained coverage between two test runs.
+"""
+
+from .json_coverage_reader import get_previous_report
+from .perf import record_cache
+from .report_worker import get_line_hits
+
+
+MYPY = False
+if MYPY:
+    from typing import Dict, List, Optional, Tuple
+
+
+if '_diffs' not in globals():
+    _diffs = {}  # type: Dict[str, CoverageDiff]
+
+
+def diff_line_coverage(previous, current):
+    # type: (List[Optional[int]], List[Optional[int]]) -> Tuple[List[int], List[int]]
+    """
+    Return the rows that were covered before and are uncovered now, and the
+    rows that were uncovered before and are covered now.  Takes `coverage`
+    lists or the hit counts of `get_line_hits`.
+    """
+    pairs = list(zip(previous, current))
+    regressed = [
+        row for row, (before, after) in enumerate(pairs)
+        if before is not None and before > 0 and after == 0
+    ]
+    gained = [
+        row for row, (before, after) in enumerate(pairs)
+        if before == 0 and after is not None and after > 0
+    ]
+    return regressed, gained
+
+
+class CoverageDiff:
+    """
+    Per-file regressed and gained rows between two reports.  Only files whose
+    coverage hash differs between the reports are compared line by line.
+    """
+
+    def __init__(self, previous, current):
+        # type: (ReportSnapshot, CoverageReport) -> None
+        self.version = (previous.version, current.version)
+        self.regressed = {}  # type: Dict[str, List[int]]
+        self.gained = {}  # type: Dict[str, List[int]]
+        for filename, file in current.files_by_name.items():
+            if not previous.has_file(filename) or previous.file_hash(filename) == current.file_hash(filename):
+                continue
+
+            regressed, gained = diff_line_coverage(previous.line_hits(filename), get_line_hits(file))
+            if regressed:
+                self.regressed[filename] = regressed
+            if gained:
+                self.gained[filename] = gained
+
+    def regressed_rows(self, filename):
+        # type: (str) -> List[int]
+        return self.regressed.get(filename, [])
+
+    def gained_rows(self, filename):
+        # type: (str) -> List[int]
+        return self.gained.get(filename, [])
+
+
+def get_coverage_diff(reader):
+    # type: (JsonCoverageReader) -> Optional[CoverageDiff]
+    """ Return the diff against the previous report, or None if there is none. """
+    report = reader.report
+    if report is None:
+        return None
+
+    previous = get_previous_report(report.filename)
+    if previous is None:
+        return None
+
+    diff = _diffs.get(report.filename)
+    is_current = diff is not None and diff.version == (previous.version, report.version)
+    record_cache('coverage_diff', is_current)
+    if not is_current:
+        diff = CoverageDiff(previous, report)
+        _diffs[report.filename] = diff
+    return diff
@@ -0,0 +1,106 @@
+"""
+A small on-disk summary of a project's coverage (per file: relative path,
+percentage, covered and total lines), so the project panel can be shown
+straight after a restart, before the full report has been parsed again.
+"""
+
+import hashlib
+import json
+import os
+
+from .file import get_cache_path, write_cache_file
+from .json_coverage_reader import get_report_version
+from .perf import record_cache, timed
+
+
+MYPY = False
+if MYPY:
+    from typing import Dict, List, Optional, Tuple
+
+
+FORMAT_VERSION = 1
+
+if '_saved_keys' not in globals():
+    _saved_keys = {}  # type: Dict[str, tuple]
+
+
+def get_summary_filename(coverage_filename):
+    # type: (str) -> str
+    return 'summary-{}.json'.format(hashlib.md5(coverage_filename.encode('utf-8')).hexdigest())
+
+
+def get_report_hash(coverage_filename):
+    # type: (str) -> str
+    md5 = hashlib.md5()
+    with open(coverage_filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def load_summary(coverage_filename):
+    # type: (str) -> Optional[Tuple[tuple, List[dict]]]
+    """
+    Return the key and files of the persisted summary if it was made from a
+    report with the current mtime and size.  The content hash in the key is
+    only checked once the full report has been loaded; see `save_summary`.
+    """
+    try:
+        with open(get_cache_path(get_summary_filename(coverage_filename))) as f:
+            summary = json.load(f)
+        version = get_report_version(coverage_filename)
+    except (OSError, ValueError):
+        record_cache('summary', False)
+        return None
+
+    key = tuple(summary.get('key') or ())
+    is_current = summary.get('format') == FORMAT_VERSION and key[:2] == version
+    record_cache('summary', is_current)
+    if not is_current:
+        return None
+
+    files = [
+        {'filename': filename, 'covered_percent': percent, 'covered_lines': covered, 'lines_of_code': total}
+        for filename, percent, covered, total in summary['files']
+    ]
+    return key, files
+
+
+@timed('save_summary')
+def save_summary(reader, summary_key=None):
+    # type: (JsonCoverageReader, Optional[tuple]) -> Optional[tuple]
+    """
+    Persist the summary of the reader's report unless it already is, and
+    return its (mtime, size, hash) key.  `summary_key` is the key of the
+    summary already on disk, which is kept if the report's hash matches it.
+    """
+    report = reader.report
+    if report is None:
+        return None
+
+    saved_key = _saved_keys.get(report.filename)
+    if saved_key is not None and saved_key[:2] == report.version:
+        return saved_key
+
+    key = report.version + (get_report_hash(report.filename),)
+    if key == summary_key:
+        _saved_keys[report.filename] = key
+        return key
+
+    files = sorted(
+        (
+            [os.path.relpath(file['filename'], reader.project_root), file['covered_percent'],
+             file['covered_lines'], file['lines_of_code']]
+            for file in report.data['files']
+        ),
+        key=lambda file: file[1]
+    )
+    summary = {'format': FORMAT_VERSION, 'key': key, 'files': files}
+    try:
+        write_cache_file(get_summary_filename(report.filename), json.dumps(summary).encode('utf-8'))
+    except OSError as e:
+        print('SimpleCov: could not save coverage summary: {}'.format(e))
+        return key
+
+    _saved_keys[report.filename] = key
+    return key
@@ -1,10 +1,8 @@
 from collections import defaultdict
 from contextlib import contextmanager
 import os
-import plistlib
 import re
 import threading
-import yaml
 
 import sublime
 
@@ -41,6 +39,7 @@ def try_parse_for_file_extensions(text):
 def _try_yaml_parse(text):
     # type: (str) -> Optional[List[str]]
     try:
+        import yaml
         return yaml.safe_load(text)["file_extensions"]
     except Exception:
         return None
@@ -54,6 +53,8 @@ def _determine_syntax_files():
 
 def handle_tm_language_files():
     # type: () -> None
+    import plistlib
+
     syntax_files = sublime.find_resources("*.tmLanguage")
     for syntax_file in syntax_files:
         try:
@@ -160,3 +161,38 @@ def safe_open(filename, mode, *args, **kwargs):
     except OSError as e:
         sublime.ok_cancel_dialog("SimpleCov encountered an OS error: \n{}".format(e))
         raise e
+
+
+def get_cache_path(filename):
+    # type: (str) -> str
+    """
+    Return the path of `filename` in the plugin's directory under Sublime's
+    cache directory, creating that directory if needed.
+    """
+    cache_dir = os.path.join(sublime.cache_path(), 'SimpleCov')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+def write_cache_file(filename, data):
+    # type: (str, bytes) -> None
+    """
+    Atomically replace `filename` in the cache directory with `data`, so a
+    concurrent reader never sees a partially written file.
+    """
+    path = get_cache_path(filename)
+    temp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def get_startupinfo():
+    """ Keep a console window from flashing up for subprocesses on Windows. """
+    if os.name != 'nt':
+        return None
+
+    import subprocess
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
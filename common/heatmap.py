@@ -0,0 +1,141 @@
+"""
+Adaptive "heat" levels for covered lines.  Instead of fixed hit counts, the
+level boundaries follow the distribution of hit counts across the whole
+report, estimated once per report version with a streaming quantile sketch.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+import math
+
+import sublime
+
+from .perf import record_cache, timed
+from .report_worker import get_line_hits
+
+
+MYPY = False
+if MYPY:
+    from typing import Dict, List, Optional, Tuple
+
+
+MAX_HEAT_LEVELS = 9
+
+if '_thresholds' not in globals():
+    _thresholds = {}  # type: Dict[str, Tuple[tuple, List[int]]]
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (after DDSketch).  Positive values are
+    counted in buckets whose bounds grow geometrically, so every quantile is
+    answered within `relative_accuracy` while memory grows with the logarithm
+    of the value range, not with the number of values.  Past `max_buckets`
+    the lowest buckets are merged, trading accuracy at the cold end only.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}  # type: Dict[int, int]
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value, count=1):
+        # type: (float, int) -> None
+        index = int(math.ceil(math.log(value) / self.log_gamma))
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.max = max(self.max, value)
+        if len(self.buckets) > self.max_buckets:
+            lowest, next_lowest = sorted(self.buckets)[:2]
+            self.buckets[next_lowest] += self.buckets.pop(lowest)
+
+    def quantiles(self, qs):
+        # type: (List[float]) -> List[float]
+        """ Estimate the values at each of the (ascending) quantiles `qs`. """
+        if not self.count:
+            return []
+
+        values = []
+        qs = list(qs)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while qs and seen > qs[0] * (self.count - 1):
+                values.append(2 * self.gamma ** index / (self.gamma + 1))
+                qs.pop(0)
+        return values
+
+
+@timed('compute_heat_thresholds')
+def compute_heat_thresholds(report, heat_levels):
+    # type: (CoverageReport, int) -> List[int]
+    """
+    The ascending, distinct hit counts separating up to `heat_levels` levels
+    of the covered lines in the report.  Lines hit at most the median number
+    of times make up the coolest level; above that, levels are spaced evenly
+    on a log scale up to the hottest line.  Plain quantiles would collapse
+    when most lines are hit once, putting lines hit twice in the same level
+    as lines hit a million times.
+    """
+    sketch = QuantileSketch()
+    for file in report.data['files']:
+        for hits, count in Counter(get_line_hits(file)).items():
+            if hits is not None and hits > 0:
+                sketch.add(hits, count)
+    if not sketch.count:
+        return []
+
+    median = min(max(1.0, sketch.quantiles([0.5])[0]), sketch.max)
+    thresholds = [median] + [
+        median * (sketch.max / median) ** (float(level) / (heat_levels - 1))
+        for level in range(1, heat_levels - 1)
+    ]
+    return sorted(set(max(1, int(round(threshold))) for threshold in thresholds))
+
+
+def get_heat_levels():
+    # type: () -> Optional[int]
+    """ The number of heat levels if adaptive coverage levels are on, else None. """
+    settings = sublime.load_settings('SimpleCov.sublime-settings')
+    if settings.get('coverage_levels_mode') != 'adaptive':
+        return None
+    return max(2, min(MAX_HEAT_LEVELS, int(settings.get('heat_levels', 4))))
+
+
+def get_heat_thresholds(reader, heat_levels):
+    # type: (JsonCoverageReader, int) -> List[int]
+    """ Return the heat thresholds for the reader's report, computing them on first use. """
+    report = reader.report
+    key = (report.version, heat_levels)
+    cached = _thresholds.get(report.filename)
+    record_cache('heat_thresholds', cached is not None and cached[0] == key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    thresholds = compute_heat_thresholds(report, heat_levels)
+    _thresholds[report.filename] = (key, thresholds)
+    return thresholds
+
+
+def get_heat_level(hits, thresholds, heat_levels):
+    # type: (int, List[int], int) -> int
+    """
+    The 0-based heat level of a covered line.  If there are fewer thresholds
+    than levels, the levels they give are spread evenly over all levels, so
+    the hottest lines still get the top level and the coolest the bottom.
+    """
+    if not thresholds:
+        return 0
+    return bisect_left(thresholds, hits) * (heat_levels - 1) // len(thresholds)
+
+
+def interpolate_color(start, end, fraction):
+    # type: (str, str, float) -> str
+    """ Blend two `#RRGGBB` colors. """
+    start_rgb = [int(start[i:i + 2], 16) for i in (1, 3, 5)]
+    end_rgb = [int(end[i:i + 2], 16) for i in (1, 3, 5)]
+    return '#' + ''.join(
+        '{:02X}'.format(int(round(a + (b - a) * fraction))) for a, b in zip(start_rgb, end_rgb))
@@ -1,6 +1,103 @@
 import os
+import hashlib
 import json
 import re
+import shutil
+import threading
+
+import sublime
+
+from . import report_worker
+from .file import get_cache_path, get_startupinfo
+from .perf import record_cache, timed
+
+
+MYPY = False
+if MYPY:
+    from typing import Callable, Dict, List, Optional
+
+WORKER_TIMEOUT = 120
+
+
+if '_reports' not in globals():
+    _reports = {}  # type: Dict[str, CoverageReport]
+
+if '_previous_reports' not in globals():
+    _previous_reports = {}  # type: Dict[str, ReportSnapshot]
+
+# Reports are loaded from both the main and the async thread.
+if '_reports_lock' not in globals():
+    _reports_lock = threading.Lock()
+
+# Callbacks waiting for a report being loaded in the background, by report.
+if '_background_loads' not in globals():
+    _background_loads = {}  # type: Dict[str, List[Callable[[], None]]]
+
+# The version of each report that failed to load in the background.
+if '_failed_loads' not in globals():
+    _failed_loads = {}  # type: Dict[str, tuple]
+
+
+class CoverageReport:
+    """
+    A parsed coverage report together with the version (mtime and size) of the
+    file it was parsed from, so derived data only needs rebuilding when the
+    report changes on disk.
+    """
+
+    def __init__(self, filename, version, data):
+        self.filename = filename
+        self.version = version
+        self.data = data
+        self.files_by_name = dict((file['filename'], file) for file in data['files'])
+        self._file_hashes = {}  # type: Dict[str, int]
+
+    def file_hash(self, filename):
+        """ A hash of a file's line coverage, for spotting files whose data changed. """
+        file_hash = self._file_hashes.get(filename)
+        if file_hash is None:
+            file_hash = report_worker.hash_line_hits(report_worker.get_line_hits(self.files_by_name[filename]))
+            self._file_hashes[filename] = file_hash
+        return file_hash
+
+
+class ReportSnapshot:
+    """
+    What the coverage diff needs of a report replaced by a newer version:
+    the hit counts of each file, packed into one array, and their hashes.
+    A compact report's array is shared rather than copied.
+    """
+
+    def __init__(self, report):
+        # type: (CoverageReport) -> None
+        self.filename = report.filename
+        self.version = report.version
+        files = report.data['files']
+        if files and all(
+            isinstance(file, report_worker.CompactFile) and file.hits is files[0].hits for file in files
+        ):
+            self.hits = files[0].hits
+            self.ranges = dict((file['filename'], (file.start, file.end)) for file in files)
+        else:
+            self.hits, ranges = report_worker.pack_line_hits(
+                [report_worker.get_line_hits(file) for file in files])
+            self.ranges = dict(zip([file['filename'] for file in files], ranges))
+        self._file_hashes = dict(report._file_hashes)  # type: Dict[str, int]
+
+    def has_file(self, filename):
+        return filename in self.ranges
+
+    def line_hits(self, filename):
+        start, end = self.ranges[filename]
+        return self.hits[start:end]
+
+    def file_hash(self, filename):
+        file_hash = self._file_hashes.get(filename)
+        if file_hash is None:
+            file_hash = report_worker.hash_line_hits(self.line_hits(filename))
+            self._file_hashes[filename] = file_hash
+        return file_hash
+
 
 class JsonCoverageReader:
     """
@@ -8,10 +105,20 @@ class JsonCoverageReader:
     makes whole-project, whole-file and line-specific coverage data available.
     """
 
-    def __init__(self, filename):
-        """ Load coverage data given the filename for any file in the project. """
+    def __init__(self, filename, on_loaded=None):
+        """
+        Load coverage data given the filename for any file in the project.
+
+        If `on_loaded` is given and the report is too large to load without
+        holding up the UI, it is loaded in the background instead: `loading`
+        is set, there is no coverage data, and `on_loaded` is called on the
+        main thread once the report is loaded.
+        """
+        self.report = None
+        self.loading = False
+        self.exempt_patterns = None
         self.project_root = get_project_root(filename)
-        self.coverage = self.get_coverage_data() if self.project_root else None
+        self.coverage = self.get_coverage_data(on_loaded) if self.project_root else None
 
     def get_project_coverage(self):
         coverage_data = dict(self.coverage)
@@ -23,58 +130,224 @@ class JsonCoverageReader:
         if self.coverage is None or self.is_file_exempt(filename):
             return
 
-        coverage_files = self.coverage['files']
-        for coverage_file in coverage_files:
-                if coverage_file['filename'] == filename:
-                        return coverage_file
+        return self.report.files_by_name.get(filename)
 
     def is_file_exempt(self, filename):
         normalized_filename = os.path.normpath(filename).replace('\\', '/')
 
-        exempt = [r'/test/', r'/spec/', r'/features/', r'Gemfile$', r'Rakefile$', r'\.rake$',
-            r'\.gemspec']
-
-        ignore = os.path.join(self.project_root, '.covignore')
-        if os.path.isfile(ignore):
-            for path in open(ignore).read().rstrip("\n").split("\n"):
-                exempt.append(path)
-
-        for pattern in exempt:
-            if re.compile(pattern).search(normalized_filename) is not None:
+        for pattern in self.get_exempt_patterns():
+            if pattern.search(normalized_filename) is not None:
                 return True
         return False
 
-    def get_coverage_data(self):
+    def get_exempt_patterns(self):
+        """ The compiled exempt patterns, reading `.covignore` only once per reader. """
+        if self.exempt_patterns is None:
+            exempt = [r'/test/', r'/spec/', r'/features/', r'Gemfile$', r'Rakefile$', r'\.rake$',
+                r'\.gemspec']
+
+            ignore = os.path.join(self.project_root, '.covignore')
+            if os.path.isfile(ignore):
+                for path in open(ignore).read().rstrip("\n").split("\n"):
+                    exempt.append(path)
+
+            self.exempt_patterns = [re.compile(pattern) for pattern in exempt]
+        return self.exempt_patterns
+
+    @timed('get_coverage_data')
+    def get_coverage_data(self, on_loaded=None):
         coverage_filename = self.get_coverage_filename()
         if not coverage_filename:
             return
 
-        return json.load(open(coverage_filename))
+        if on_loaded is not None and needs_background_load(coverage_filename):
+            self.loading = True
+            load_report_in_background(coverage_filename, on_loaded)
+            return
+
+        self.report = load_report(coverage_filename)
+        return self.report.data
 
     def make_filename_relative(self, file):
+        # Copy, so the cached report keeps its absolute filenames.
+        file = dict(file)
         file['filename'] = os.path.relpath(file['filename'], self.project_root)
         return file
 
     def get_coverage_filename(self):
-        if not self.project_root:
-            return
+        return find_coverage_filename(self.project_root)
+
+@timed('get_project_root')
+def get_project_root(filename):
+    """the parent directory that contains a directory called 'coverage'"""
+    while True:
+        coverage_directory = os.path.join(filename, 'coverage')
+        if os.access(coverage_directory, os.R_OK):
+            return filename
 
-        coverage_filename = os.path.join(self.project_root, 'coverage', 'sublime.json')
-        if not os.access(coverage_filename, os.R_OK):
-            print('Could not find coverage.json file.')
+        parent, current = os.path.split(filename)
+        if not current:
+            print('Could not find coverage directory.')
             return
 
-        return coverage_filename
+        filename = parent
 
-def get_project_root(filename):
-    """the parent directory that contains a directory called 'coverage'"""
-    coverage_directory = os.path.join(filename, 'coverage')
-    if os.access(coverage_directory, os.R_OK):
-        return filename
+def find_coverage_filename(project_root):
+    if not project_root:
+        return
 
-    parent, current = os.path.split(filename)
-    if not current:
-        print('Could not find coverage directory.')
+    coverage_filename = os.path.join(project_root, 'coverage', 'sublime.json')
+    if not os.access(coverage_filename, os.R_OK):
+        print('Could not find coverage.json file.')
         return
 
-    return get_project_root(parent)
+    return coverage_filename
+
+def get_report_version(coverage_filename):
+    """ The (mtime, size) pair identifying the current contents of a report. """
+    stat = os.stat(coverage_filename)
+    return (stat.st_mtime, stat.st_size)
+
+def load_report(coverage_filename):
+    """ Return the parsed report, re-reading it only when it changed on disk. """
+    version = get_report_version(coverage_filename)
+    report = _reports.get(coverage_filename)
+    record_cache('report', report is not None and report.version == version)
+    if report is not None and report.version == version:
+        return report
+
+    with _reports_lock:
+        # Another thread may have loaded this version while we waited.
+        version = get_report_version(coverage_filename)
+        report = _reports.get(coverage_filename)
+        if report is None or report.version != version:
+            if report is not None:
+                _previous_reports[coverage_filename] = ReportSnapshot(report)
+            report = CoverageReport(coverage_filename, version, parse_report(coverage_filename, version))
+            _reports[coverage_filename] = report
+        return report
+
+def needs_background_load(coverage_filename):
+    """
+    Whether loading the report would hold up the UI: it is not loaded yet and
+    at least `report_worker_min_size` bytes, and loading this version in the
+    background has not failed before.
+    """
+    version = get_report_version(coverage_filename)
+    report = _reports.get(coverage_filename)
+    if (report is not None and report.version == version) or _failed_loads.get(coverage_filename) == version:
+        return False
+
+    min_size = sublime.load_settings('SimpleCov.sublime-settings').get('report_worker_min_size')
+    return min_size is not None and version[1] >= min_size
+
+def load_report_in_background(coverage_filename, on_loaded):
+    """
+    Load the report on Sublime's async thread, then call `on_loaded` on the
+    main thread.  If loading fails, `on_loaded` is called all the same and the
+    next load of that version happens in the foreground, so the error shows
+    up the way it would have without background loading.  Only to be called
+    on the main thread.
+    """
+    callbacks = _background_loads.get(coverage_filename)
+    if callbacks is not None:
+        callbacks.append(on_loaded)
+        return
+
+    _background_loads[coverage_filename] = [on_loaded]
+    sublime.status_message('SimpleCov: loading coverage report…')
+
+    def load():
+        version = get_report_version(coverage_filename)
+        try:
+            load_report(coverage_filename)
+        except Exception as e:
+            print('SimpleCov: could not load {}: {}'.format(coverage_filename, e))
+            _failed_loads[coverage_filename] = version
+        sublime.set_timeout(finish, 0)
+
+    def finish():
+        for callback in _background_loads.pop(coverage_filename, []):
+            callback()
+
+    sublime.set_timeout_async(load, 0)
+
+def is_report_loaded(coverage_filename):
+    """ Whether the current version of the report is already parsed and cached. """
+    report = _reports.get(coverage_filename)
+    return report is not None and report.version == get_report_version(coverage_filename)
+
+def get_previous_report(coverage_filename):
+    """ The snapshot of the report that was loaded before the current one, if any. """
+    return _previous_reports.get(coverage_filename)
+
+def parse_report(coverage_filename, version):
+    """
+    Parse a report, in a separate worker process when it is large enough and
+    a Python interpreter to run the worker is available, otherwise in-process.
+    """
+    min_size = sublime.load_settings('SimpleCov.sublime-settings').get('report_worker_min_size')
+    if min_size is not None and version[1] >= min_size:
+        data = parse_report_in_worker(coverage_filename, version)
+        if data is not None:
+            return data
+
+    with open(coverage_filename) as f:
+        return json.load(f)
+
+@timed('parse_report_in_worker')
+def parse_report_in_worker(coverage_filename, version):
+    """
+    Have the report worker convert the report to its compact form and load
+    that.  Returns None if the worker is unavailable or fails.
+    """
+    compact_filename = get_cache_path('report-{}.bin'.format(
+        hashlib.md5(coverage_filename.encode('utf-8')).hexdigest()))
+
+    # A compact form left by an earlier run (or session) for this version.
+    data = report_worker.read_compact_report(compact_filename, coverage_filename, version)
+    if data is not None:
+        return data
+
+    command = get_worker_command()
+    if command is None:
+        return None
+
+    import subprocess
+    try:
+        process = subprocess.Popen(
+            command + [coverage_filename, compact_filename],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            startupinfo=get_startupinfo())
+        _, error = process.communicate(timeout=WORKER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        print('SimpleCov: report worker timed out, parsing {} in-process.'.format(coverage_filename))
+        return None
+    except OSError as e:
+        print('SimpleCov: could not start report worker: {}'.format(e))
+        return None
+
+    if process.returncode != 0:
+        print('SimpleCov: report worker failed: {}'.format(error.decode('utf-8', 'replace')))
+        return None
+
+    return report_worker.read_compact_report(compact_filename, coverage_filename, version)
+
+def get_worker_command():
+    # type: () -> Optional[List[str]]
+    """ The command line to run the report worker, or None if there is no interpreter. """
+    python = sublime.load_settings('SimpleCov.sublime-settings').get('report_worker_python')
+    python = python and shutil.which(python)
+    if not python:
+        return None
+
+    script = os.path.abspath(report_worker.__file__)
+    if os.path.isfile(script):
+        return [python, script]
+
+    # Inside a .sublime-package archive the worker is not a file on disk.
+    package = __name__.split('.')[0]
+    source = sublime.load_resource('Packages/{}/common/report_worker.py'.format(package))
+    return [python, '-c', source]
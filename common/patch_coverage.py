@@ -0,0 +1,221 @@
+"""
+Coverage of the lines changed since a git base revision ("patch coverage").
+The changed lines come from a local `git diff`, which is only re-run when
+HEAD, the index or the working tree files involved have changed.
+"""
+
+import os
+import re
+
+from .file import get_startupinfo
+from .perf import record_cache
+
+
+MYPY = False
+if MYPY:
+    from typing import Dict, List, Optional, Tuple
+
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+QUOTED_PATH_ESCAPE = re.compile(r'\\([0-7]{3}|.)')
+C_ESCAPES = {'a': 7, 'b': 8, 't': 9, 'n': 10, 'v': 11, 'f': 12, 'r': 13, '"': 34, '\\': 92}
+
+if '_file_diffs' not in globals():
+    _file_diffs = {}  # type: Dict[Tuple[str, str], Tuple[tuple, Optional[List[int]]]]
+
+if '_project_diffs' not in globals():
+    _project_diffs = {}  # type: Dict[str, Tuple[tuple, Optional[Dict[str, List[int]]]]]
+
+
+def parse_diff(diff_text):
+    # type: (str) -> Dict[str, List[int]]
+    """
+    Given the output of `git diff --unified=0`, return the changed rows
+    (0-based, in the new version of each file) keyed by file path.  The line
+    counts in each hunk header tell where the hunk ends, so that changed
+    lines starting with `+++ ` or `--- ` are not taken for file headers.
+    """
+    changed_rows = {}  # type: Dict[str, List[int]]
+    rows = None  # type: Optional[List[int]]
+    old_remaining = new_remaining = 0
+    for line in diff_text.split('\n'):
+        if old_remaining > 0 or new_remaining > 0:
+            if line.startswith('-'):
+                old_remaining -= 1
+            elif line.startswith('+'):
+                new_remaining -= 1
+            elif line.startswith(' '):
+                old_remaining -= 1
+                new_remaining -= 1
+        elif line.startswith('+++ '):
+            path = unquote_path(line[4:])
+            if path == '/dev/null':
+                rows = None
+            else:
+                rows = changed_rows.setdefault(path[2:] if path.startswith('b/') else path, [])
+        elif line.startswith('@@'):
+            match = HUNK_HEADER.match(line)
+            if match:
+                old_remaining = 1 if match.group(1) is None else int(match.group(1))
+                start = int(match.group(2))
+                new_remaining = 1 if match.group(3) is None else int(match.group(3))
+                if rows is not None:
+                    rows.extend(range(start - 1, start - 1 + new_remaining))
+    return changed_rows
+
+
+def unquote_path(path):
+    # type: (str) -> str
+    """
+    Undo git's quoting of a path in a diff header: paths containing spaces
+    get a trailing TAB, and paths with special characters are C-quoted with
+    octal escapes for the bytes of non-ASCII characters.
+    """
+    if path.endswith('\t'):
+        path = path[:-1]
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    def unescape(match):
+        escape = match.group(1)
+        if len(escape) == 3:
+            return chr(int(escape, 8))
+        return chr(C_ESCAPES.get(escape, ord(escape)))
+
+    # Octal escapes are bytes, so unescape to Latin-1 and decode them as UTF-8.
+    unescaped = QUOTED_PATH_ESCAPE.sub(unescape, path[1:-1].encode('utf-8').decode('latin-1'))
+    return unescaped.encode('latin-1').decode('utf-8', 'replace')
+
+
+def run_git_diff(project_root, base, path=None):
+    # type: (str, str, Optional[str]) -> Optional[Dict[str, List[int]]]
+    """ Run `git diff` in the project root, returning None if git fails. """
+    import subprocess
+
+    command = ['git', '-c', 'core.quotePath=false', 'diff', '--no-color', '--no-ext-diff',
+               '--unified=0', '--relative', '--src-prefix=a/', '--dst-prefix=b/', base, '--']
+    if path is not None:
+        command.append(path)
+
+    try:
+        output = subprocess.check_output(command, cwd=project_root, stderr=subprocess.PIPE,
+                                         startupinfo=get_startupinfo())
+    except (OSError, subprocess.CalledProcessError) as e:
+        print('SimpleCov: git diff against {} failed: {}'.format(base, e))
+        return None
+
+    return parse_diff(output.decode('utf-8', 'replace'))
+
+
+def find_git_dir(path):
+    # type: (str) -> Optional[str]
+    while True:
+        candidate = os.path.join(path, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            with open(candidate) as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(path, content[len('gitdir:'):].strip()))
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def get_mtime(path):
+    # type: (str) -> Optional[float]
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def get_head_state(project_root):
+    # type: (str) -> Optional[tuple]
+    """
+    A cheap stand-in for the HEAD commit and index state, read from the git
+    directory without spawning git.
+    """
+    git_dir = find_git_dir(project_root)
+    if git_dir is None:
+        return None
+
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+
+    ref_mtime = None
+    if head.startswith('ref: '):
+        ref_mtime = (
+            get_mtime(os.path.join(git_dir, head[len('ref: '):]))
+            or get_mtime(os.path.join(git_dir, 'packed-refs'))
+        )
+    return (head, ref_mtime, get_mtime(os.path.join(git_dir, 'index')))
+
+
+def get_file_changed_rows(project_root, filename, base):
+    # type: (str, str, str) -> Optional[List[int]]
+    """ The rows of `filename` changed since `base`, or None outside a git repository. """
+    head_state = get_head_state(project_root)
+    if head_state is None:
+        return None
+
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    key = (head_state, base, stat.st_mtime, stat.st_size)
+    cached = _file_diffs.get((project_root, filename))
+    record_cache('git_diff_file', cached is not None and cached[0] == key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    changed_rows = run_git_diff(project_root, base, filename)
+    rows = None if changed_rows is None else changed_rows.get(
+        os.path.relpath(filename, project_root).replace('\\', '/'), [])
+    _file_diffs[(project_root, filename)] = (key, rows)
+    return rows
+
+
+def get_project_changed_rows(project_root, filenames, base):
+    # type: (str, List[str], str) -> Optional[Dict[str, List[int]]]
+    """
+    The changed rows of every file in the project keyed by absolute filename,
+    or None outside a git repository.  `filenames` are the files whose
+    modification times make up the working tree part of the cache key.
+    """
+    head_state = get_head_state(project_root)
+    if head_state is None:
+        return None
+
+    tree_mtime = max([get_mtime(filename) or 0 for filename in filenames] or [0])
+    key = (head_state, base, tree_mtime)
+    cached = _project_diffs.get(project_root)
+    record_cache('git_diff_project', cached is not None and cached[0] == key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    changed_rows = run_git_diff(project_root, base)
+    if changed_rows is not None:
+        changed_rows = dict(
+            (os.path.normpath(os.path.join(project_root, path)), rows)
+            for path, rows in changed_rows.items()
+        )
+    _project_diffs[project_root] = (key, changed_rows)
+    return changed_rows
+
+
+def get_patch_coverage(line_coverage, rows):
+    # type: (List[Optional[int]], List[int]) -> Tuple[int, int]
+    """ The number of covered and of executable lines among the changed rows. """
+    executable = [
+        line_coverage[row] for row in rows
+        if row < len(line_coverage) and line_coverage[row] is not None
+    ]
+    return sum(1 for hits in executable if hits > 0), len(executable)
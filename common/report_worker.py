@@ -0,0 +1,191 @@
+"""
+Stand-alone worker that parses a SimpleCov JSON report outside Sublime's
+plugin host and saves it in a compact binary form: a one-line JSON header
+with the summary fields of the report and of each file, followed by the hit
+counts of every line of every file as one array of the smallest integer type
+that holds them.  Reading that back is a small JSON parse plus one block
+read, and the line coverage of a file is only unpacked into a list when it
+is first used.  It only uses the standard library, so any Python 3
+interpreter can run it:
+
+    python3 report_worker.py REPORT OUTPUT
+
+The plugin imports this module too, to read what the worker wrote.
+"""
+
+from array import array
+import json
+import os
+import sys
+
+
+FORMAT_VERSION = 2
+
+# Hit counts are stored with the smallest of these array types that fits them.
+HITS_TYPECODES = 'bhiq'
+
+# Stands in for the `null` hit count of lines that are not executable.
+NOT_EXECUTABLE = -1
+
+
+class CompactFile(dict):
+    """
+    A file of a compact report.  The summary fields are set up front, while
+    `coverage` is unpacked from the report's shared hit count array the first
+    time it is looked up.
+    """
+
+    def __init__(self, fields, hits, start, end):
+        dict.__init__(self, fields)
+        self.hits = hits
+        self.start = start
+        self.end = end
+
+    def __missing__(self, key):
+        if key != 'coverage':
+            raise KeyError(key)
+        coverage = [None if hits == NOT_EXECUTABLE else hits for hits in self.hits[self.start:self.end]]
+        self['coverage'] = coverage
+        return coverage
+
+    def line_hits(self):
+        """ The file's slice of the hit count array, without unpacking `coverage`. """
+        return self.hits[self.start:self.end]
+
+
+
+def get_line_hits(file):
+    """
+    The hit counts of a file's lines: the packed counts of a compact file, in
+    which lines that are not executable are NOT_EXECUTABLE, and `coverage`
+    of a file parsed from JSON, in which they are None.  Scans over a whole
+    report use this, so that they leave compact files packed.
+    """
+    if isinstance(file, CompactFile):
+        return file.line_hits()
+    return file['coverage']
+
+
+def hash_line_hits(line_hits):
+    """
+    A hash of a file's hit counts that is the same for a `coverage` list and
+    for packed counts of any array type.
+    """
+    if isinstance(line_hits, array):
+        return hash(array('q', line_hits).tobytes())
+    return hash(array('q', [NOT_EXECUTABLE if hits is None else hits for hits in line_hits]).tobytes())
+
+
+def pack_line_hits(files_line_hits):
+    """
+    Pack the hit counts of several files into one array of the smallest type
+    that holds them, returning it and the (start, end) of each file in it.
+    """
+    max_hits = 0
+    for line_hits in files_line_hits:
+        for hits in line_hits:
+            if hits is not None and hits > max_hits:
+                max_hits = hits
+
+    packed = array(get_hits_typecode(max_hits))
+    ranges = []
+    for line_hits in files_line_hits:
+        start = len(packed)
+        packed.extend(NOT_EXECUTABLE if hits is None else hits for hits in line_hits)
+        ranges.append((start, len(packed)))
+    return packed, ranges
+
+
+def get_report_version(report_filename):
+    stat = os.stat(report_filename)
+    return (stat.st_mtime, stat.st_size)
+
+
+def get_hits_typecode(max_hits):
+    for typecode in HITS_TYPECODES:
+        if max_hits < 2 ** (8 * array(typecode).itemsize - 1):
+            return typecode
+    raise OverflowError('hit count too large: {}'.format(max_hits))
+
+
+def build_compact_report(report_filename):
+    """ Return the header and the hit count array of the compact form of a report. """
+    version = get_report_version(report_filename)
+    with open(report_filename, encoding='utf-8') as f:
+        data = json.load(f)
+
+    hits, ranges = pack_line_hits([file['coverage'] for file in data['files']])
+    files = [
+        [dict((key, value) for key, value in file.items() if key != 'coverage'), end - start]
+        for file, (start, end) in zip(data['files'], ranges)
+    ]
+
+    header = {
+        'format': FORMAT_VERSION,
+        'source': report_filename,
+        'version': version,
+        'byteorder': sys.byteorder,
+        'typecode': hits.typecode,
+        'itemsize': hits.itemsize,
+        'report': dict((key, value) for key, value in data.items() if key != 'files'),
+        'files': files,
+    }
+    return header, hits
+
+
+def write_compact_report(header, hits, output_filename):
+    """ Write atomically, so the plugin never reads a partial file. """
+    temp_filename = '{}.{}.tmp'.format(output_filename, os.getpid())
+    with open(temp_filename, 'wb') as f:
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        hits.tofile(f)
+    os.replace(temp_filename, output_filename)
+
+
+def read_compact_report(output_filename, report_filename, version):
+    """
+    Return the report data saved in `output_filename`, or None if there is
+    none or it was built from another report or version of the report.
+    """
+    try:
+        with open(output_filename, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            hits = array(header['typecode'])
+            hits.frombytes(f.read())
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+    if (
+        header.get('format') != FORMAT_VERSION
+        or header.get('source') != report_filename
+        or tuple(header.get('version') or ()) != tuple(version)
+        or header.get('byteorder') != sys.byteorder
+        or header.get('itemsize') != hits.itemsize
+    ):
+        return None
+
+    files = []
+    start = 0
+    for fields, length in header['files']:
+        files.append(CompactFile(fields, hits, start, start + length))
+        start += length
+    if start != len(hits):
+        return None
+
+    data = header['report']
+    data['files'] = files
+    return data
+
+
+def main(argv):
+    if len(argv) != 3:
+        sys.stderr.write('usage: {} REPORT OUTPUT\n'.format(argv[0]))
+        return 2
+
+    header, hits = build_compact_report(argv[1])
+    write_compact_report(header, hits, argv[2])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
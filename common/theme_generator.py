@@ -5,11 +5,11 @@ to a view.
 """
 
 import os
-from xml.etree import ElementTree
 from collections import OrderedDict
 
 import sublime
 from . import file
+from .perf import timed
 
 STYLES_HEADER = """
 <?xml version="1.0" encoding="UTF-8"?>
@@ -102,6 +102,7 @@ class ThemeGenerator():
         """
         pass
 
+    @timed('ThemeGenerator.apply_new_theme')
     def apply_new_theme(self, name, target_view):
         """
         Apply the transformed theme to the specified target view.
@@ -126,6 +127,9 @@ class XMLThemeGenerator(ThemeGenerator):
     hidden_theme_extension = "hidden-tmTheme"
 
     def __init__(self, original_color_scheme):
+        # Only needed for `.tmTheme` color schemes, so imported on first use.
+        from xml.etree import ElementTree
+
         super().__init__(original_color_scheme)
         self.plist = ElementTree.XML(self.color_scheme_string)
         styles = self.plist.find("./dict/array")
@@ -133,11 +137,15 @@ class XMLThemeGenerator(ThemeGenerator):
         self.styles = styles
 
     def _add_scoped_style(self, name, scope, **kwargs):
+        from xml.etree import ElementTree
+
         properties = "".join(PROPERTY_TEMPLATE.format(key=k, value=v) for k, v in kwargs.items())
         new_style = STYLE_TEMPLATE.format(name=name, scope=scope, properties=properties)
         self.styles.append(ElementTree.XML(new_style))
 
     def write_new_theme(self, name):
+        from xml.etree import ElementTree
+
         full_path = os.path.join(sublime.packages_path(), self.get_theme_path(name))
 
         with file.safe_open(full_path, "wb", buffering=0) as out_f:
@@ -165,7 +173,7 @@ class JSONThemeGenerator(ThemeGenerator):
     def write_new_theme(self, name):
         full_path = os.path.join(sublime.packages_path(), self.get_theme_path(name))
 
-        with util.file.safe_open(full_path, "wb", buffering=0) as out_f:
+        with file.safe_open(full_path, "wb", buffering=0) as out_f:
             out_f.write(sublime.encode_value(self.dict, pretty=True).encode("utf-8"))
 
 
@@ -0,0 +1,119 @@
+"""
+Index of the uncovered hunks of every file in a coverage report.  The index
+is built once per report version, after which finding the next or previous
+hunk from any line is a bisect rather than a scan.
+"""
+
+from bisect import bisect_left, bisect_right
+
+from .perf import record_cache
+from .report_worker import NOT_EXECUTABLE, get_line_hits
+
+
+MYPY = False
+if MYPY:
+    from typing import Callable, Dict, List, Optional, Tuple
+
+
+if '_indexes' not in globals():
+    _indexes = {}  # type: Dict[str, UncoveredIndex]
+
+
+def find_uncovered_hunks(line_coverage):
+    # type: (List[Optional[int]]) -> Tuple[List[int], List[int]]
+    """
+    Return the start and end rows of each run of uncovered lines.  Lines that
+    are not executable (blank lines, comments) do not break a run.  Takes
+    either a `coverage` list or the hit counts of `get_line_hits`.
+    """
+    starts = []  # type: List[int]
+    ends = []  # type: List[int]
+    in_hunk = False
+    for row, hits in enumerate(line_coverage):
+        if hits is None or hits == NOT_EXECUTABLE:
+            continue
+        if hits > 0:
+            in_hunk = False
+        elif in_hunk:
+            ends[-1] = row
+        else:
+            starts.append(row)
+            ends.append(row)
+            in_hunk = True
+    return starts, ends
+
+
+class UncoveredIndex:
+    """
+    Uncovered hunks of every non-exempt file in a report, plus the sorted
+    list of files that have any, for navigating across the project.
+    """
+
+    def __init__(self, report, is_file_exempt):
+        # type: (CoverageReport, Callable[[str], bool]) -> None
+        self.version = report.version
+        self.hunks = {}  # type: Dict[str, Tuple[List[int], List[int]]]
+        for file in report.data['files']:
+            filename = file['filename']
+            if is_file_exempt(filename):
+                continue
+            starts, ends = find_uncovered_hunks(get_line_hits(file))
+            if starts:
+                self.hunks[filename] = (starts, ends)
+        self.filenames = sorted(self.hunks)
+
+    def hunks_for(self, filename):
+        # type: (str) -> Tuple[List[int], List[int]]
+        return self.hunks.get(filename, ([], []))
+
+    def next_in_file(self, filename, row):
+        # type: (str, int) -> Optional[int]
+        """ The start row of the first hunk starting after `row`. """
+        starts = self.hunks_for(filename)[0]
+        i = bisect_right(starts, row)
+        return starts[i] if i < len(starts) else None
+
+    def previous_in_file(self, filename, row):
+        # type: (str, int) -> Optional[int]
+        """ The start row of the last hunk starting before `row`. """
+        starts = self.hunks_for(filename)[0]
+        i = bisect_left(starts, row)
+        return starts[i - 1] if i > 0 else None
+
+    def first_in_file(self, filename, last=False):
+        # type: (str, bool) -> Optional[int]
+        starts = self.hunks_for(filename)[0]
+        if not starts:
+            return None
+        return starts[-1] if last else starts[0]
+
+    def next_file(self, filename):
+        # type: (str) -> Optional[str]
+        """ The next file with uncovered hunks, wrapping around the project. """
+        if not self.filenames:
+            return None
+        i = bisect_right(self.filenames, filename)
+        return self.filenames[i % len(self.filenames)]
+
+    def previous_file(self, filename):
+        # type: (str) -> Optional[str]
+        """ The previous file with uncovered hunks, wrapping around the project. """
+        if not self.filenames:
+            return None
+        i = bisect_left(self.filenames, filename)
+        return self.filenames[(i - 1) % len(self.filenames)]
+
+
+def get_uncovered_index(reader):
+    # type: (JsonCoverageReader) -> Optional[UncoveredIndex]
+    """ Return the index for the reader's report, building it on first use. """
+    report = reader.report
+    if report is None:
+        return None
+
+    index = _indexes.get(report.filename)
+    record_cache('uncovered_index', index is not None and index.version == report.version)
+    if index is None or index.version != report.version:
+        index = UncoveredIndex(report, reader.is_file_exempt)
+        _indexes[report.filename] = index
+    return index
@@ -0,0 +1,65 @@
+import sublime
+import sublime_plugin
+
+from .common.json_coverage_reader import JsonCoverageReader
+from .common.uncovered_index import get_uncovered_index
+
+class GotoUncoveredHunkCommand(sublime_plugin.TextCommand):
+    """
+    Move the caret to the next or previous uncovered hunk, either within the
+    current file or across all files of the project.
+    """
+
+    def is_enabled(self, forward=True, project=False):
+        return self.view.file_name() is not None
+
+    def run(self, edit, forward=True, project=False):
+        filename = self.view.file_name()
+        reader = JsonCoverageReader(filename, on_loaded=lambda: self.view.run_command(
+            'goto_uncovered_hunk', {'forward': forward, 'project': project}))
+        if reader.loading:
+            return
+
+        index = get_uncovered_index(reader)
+        if index is None:
+            sublime.status_message('No coverage data for this project.')
+            return
+
+        row = self.get_caret_row()
+        if forward:
+            target_row = index.next_in_file(filename, row)
+        else:
+            target_row = index.previous_in_file(filename, row)
+
+        if target_row is not None:
+            self.goto_row(target_row)
+            return
+
+        target_filename = filename
+        if project:
+            target_filename = index.next_file(filename) if forward else index.previous_file(filename)
+            if target_filename is None:
+                sublime.status_message('No uncovered lines in this project.')
+                return
+
+        target_row = index.first_in_file(target_filename, last=not forward)
+        if target_row is None:
+            sublime.status_message('No uncovered lines in this file.')
+        elif target_filename == filename:
+            self.goto_row(target_row)
+        else:
+            self.view.window().open_file(
+                '{}:{}:1'.format(target_filename, target_row + 1), sublime.ENCODED_POSITION)
+
+    def get_caret_row(self):
+        regions = self.view.sel()
+        if len(regions) == 0:
+            return 0
+        return self.view.rowcol(regions[0].b)[0]
+
+    def goto_row(self, row):
+        view = self.view
+        point = view.text_point(row, 0)
+        view.sel().clear()
+        view.sel().add(sublime.Region(point, point))
+        view.show_at_center(point)
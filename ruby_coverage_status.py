@@ -3,6 +3,8 @@ import sublime
 import sublime_plugin
 
 from .common.json_coverage_reader import JsonCoverageReader
+from .common.patch_coverage import get_file_changed_rows, get_patch_coverage
+from .common.heatmap import get_heat_level, get_heat_levels, get_heat_thresholds
 
 STATUS_KEY = 'ruby-coverage-status'
 
@@ -56,11 +58,40 @@ class RubyCoverageStatusListener(sublime_plugin.EventListener):
         if line_coverage is None:
             line_coverage = 'Line not executable'
         elif line_coverage > 0:
-            line_coverage = 'Line covered × {}'.format(line_coverage)
+            line_coverage = 'Line covered × {}'.format(line_coverage) + self.get_hotness_status(r, line_coverage)
         else:
             line_coverage = 'Line not covered'
 
-        return file_coverage + ', ' + line_coverage
+        status = file_coverage + ', ' + line_coverage
+
+        patch_coverage = self.get_patch_coverage_status(r, filename, coverage)
+        if patch_coverage:
+            status += ', ' + patch_coverage
+
+        return status
+
+    def get_hotness_status(self, r, hits):
+        heat_levels = get_heat_levels()
+        if not heat_levels:
+            return ''
+
+        heat_level = get_heat_level(hits, get_heat_thresholds(r, heat_levels), heat_levels)
+        return ' (hotness {}/{})'.format(heat_level + 1, heat_levels)
+
+    def get_patch_coverage_status(self, r, filename, coverage):
+        settings = sublime.load_settings('SimpleCov.sublime-settings')
+        if not settings.get('patch_coverage'):
+            return
+
+        rows = get_file_changed_rows(r.project_root, filename, settings.get('patch_coverage_base', 'HEAD'))
+        if rows is None:
+            return
+
+        covered, total = get_patch_coverage(coverage['coverage'], rows)
+        if total == 0:
+            return 'No changed lines to cover'
+
+        return 'Patch covered {:.1f}% ({}/{})'.format(100.0 * covered / total, covered, total)
 
     def get_line_number(self):
         view = self.view
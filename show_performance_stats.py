@@ -0,0 +1,34 @@
+import sublime
+from sublime_plugin import TextCommand
+
+from .common import perf
+
+PANEL_NAME = 'simplecov-performance'
+SETTINGS_FILE = 'SimpleCov.sublime-settings'
+
+def plugin_loaded():
+    settings = sublime.load_settings(SETTINGS_FILE)
+    settings.clear_on_change('simplecov-performance-stats')
+    settings.add_on_change('simplecov-performance-stats', update_enabled)
+    update_enabled()
+
+def update_enabled():
+    perf.set_enabled(sublime.load_settings(SETTINGS_FILE).get('performance_stats', False))
+
+class ShowPerformanceStatsCommand(TextCommand):
+    """Show timings and cache hit ratios collected for the plugin's hot paths."""
+
+    def run(self, edit, reset=False):
+        window = self.view.window()
+        panel = window.create_output_panel(PANEL_NAME)
+        panel.settings().set('word_wrap', False)
+
+        panel.set_read_only(False)
+        panel.erase(edit, sublime.Region(0, panel.size()))
+        panel.insert(edit, 0, perf.format_stats())
+        panel.set_read_only(True)
+
+        window.run_command("show_panel", {"panel": "output.{}".format(PANEL_NAME)})
+
+        if reset:
+            perf.reset()
@@ -2,20 +2,30 @@ import os
 import sublime
 from sublime_plugin import TextCommand
 
-from .common.json_coverage_reader import JsonCoverageReader
+from .common.json_coverage_reader import (
+    JsonCoverageReader, find_coverage_filename, get_project_root, is_report_loaded)
+from .common.coverage_summary import load_summary, save_summary
+from .common.coverage_diff import get_coverage_diff
+from .common.patch_coverage import get_project_changed_rows, get_patch_coverage
+from .common.perf import timed
 from .common.theme_generator import ThemeGenerator
 
 PANEL_NAME = 'ruby-coverage-project'
+MAX_CHANGED_LINES_SHOWN = 10
 
 class ShowProjectRubyCoverage(TextCommand):
     """Show coverage of all files in current file's project in a panel."""
 
     def run(self, edit):
         self.get_project_coverage()
+        if self.loading:
+            return
+
         self.create_output_panel()
         self.display_project_coverage(edit)
 
     def get_project_coverage(self):
+        self.loading = False
         filename = self.view.file_name()
 
         if filename is None:
@@ -24,8 +34,76 @@ class ShowProjectRubyCoverage(TextCommand):
                 return None
             filename = window_folders[0]
 
-        r = JsonCoverageReader(filename)
+        if self.get_summary_coverage(filename):
+            return
+
+        r = JsonCoverageReader(filename, on_loaded=lambda: self.view.run_command('show_project_ruby_coverage'))
+        self.loading = r.loading
+        if r.loading:
+            return
+
+        self.project_root = r.project_root
         self.coverage = r.get_project_coverage() if r else None
+        self.coverage_diff = get_coverage_diff(r)
+        self.patch_coverage = self.get_patch_coverage(r)
+        sublime.set_timeout_async(lambda: save_summary(r), 0)
+
+    def get_summary_coverage(self, filename):
+        """
+        Right after a restart, use the persisted summary of the report instead
+        of parsing the full report first.  The full report is then loaded in
+        the background, and the panel redrawn if the summary turns out stale
+        or the full report adds to it.
+        """
+        self.summary_key = None
+        project_root = get_project_root(filename)
+        coverage_filename = find_coverage_filename(project_root)
+        if not coverage_filename or is_report_loaded(coverage_filename):
+            return False
+
+        summary = load_summary(coverage_filename)
+        if summary is None:
+            return False
+
+        self.summary_key, files = summary
+        self.project_root = project_root
+        self.coverage = {'files': files}
+        self.coverage_diff = None
+        self.patch_coverage = None
+        sublime.set_timeout_async(lambda: self.load_full_report(filename), 0)
+        return True
+
+    def load_full_report(self, filename):
+        r = JsonCoverageReader(filename)
+        key = save_summary(r, self.summary_key)
+
+        is_stale = key != self.summary_key
+        needs_patch_coverage = sublime.load_settings('SimpleCov.sublime-settings').get('patch_coverage')
+        window = self.view.window()
+        if (is_stale or needs_patch_coverage) and window and window.active_panel() == 'output.{}'.format(PANEL_NAME):
+            sublime.set_timeout(lambda: self.view.run_command('show_project_ruby_coverage'), 0)
+
+    def get_patch_coverage(self, r):
+        settings = sublime.load_settings('SimpleCov.sublime-settings')
+        if not settings.get('patch_coverage') or r.coverage is None:
+            return None
+
+        base = settings.get('patch_coverage_base', 'HEAD')
+        files = r.coverage['files']
+        changed_rows = get_project_changed_rows(
+            r.project_root, [file['filename'] for file in files], base)
+        if changed_rows is None:
+            return None
+
+        patch_coverage = []
+        for file in files:
+            rows = changed_rows.get(file['filename'])
+            if not rows or r.is_file_exempt(file['filename']):
+                continue
+            covered, total = get_patch_coverage(file['coverage'], rows)
+            if total:
+                patch_coverage.append((file['filename'], covered, total))
+        return base, patch_coverage
 
     def create_output_panel(self):
         self.panel = self.view.window().create_output_panel(PANEL_NAME)
@@ -45,6 +123,7 @@ class ShowProjectRubyCoverage(TextCommand):
         self.augment_color_scheme()
         self.apply_regions(regions)
 
+    @timed('format_project_coverage')
     def format_project_coverage(self):
         panel = self.panel
         files = self.coverage['files']
@@ -53,17 +132,54 @@ class ShowProjectRubyCoverage(TextCommand):
         max_filename_length = len(max(files, key=lambda file: len(file['filename']))['filename'])
         coverage_length = len(' 99.9%')
         graph_width = viewport_width - max_filename_length - coverage_length - 2
+        header = self.format_patch_coverage() + self.format_coverage_changes()
 
         if graph_width > 10:
-            return self.format_project_coverage_full(files, viewport_width, max_filename_length, coverage_length)
+            return self.format_project_coverage_full(files, viewport_width, max_filename_length, coverage_length, header)
         else:
-            return self.format_project_coverage_compact(files, viewport_width, max_filename_length, coverage_length)
-
-    def format_project_coverage_compact(self, files, viewport_width, max_filename_length, coverage_length):
+            return self.format_project_coverage_compact(files, viewport_width, max_filename_length, coverage_length, header)
+
+    def format_patch_coverage(self):
+        if self.patch_coverage is None:
+            return ''
+
+        base, files = self.patch_coverage
+        covered = sum(file_covered for _, file_covered, _ in files)
+        total = sum(file_total for _, _, file_total in files)
+        if total == 0:
+            return 'Patch coverage against {}: no changed lines to cover\n\n'.format(base)
+
+        output = 'Patch coverage against {}: {:.1f}% ({}/{})\n'.format(
+            base, 100.0 * covered / total, covered, total)
+        for filename, file_covered, file_total in sorted(files, key=lambda file: file[1] / file[2]):
+            output += '  {} {:.1f}% ({}/{})\n'.format(
+                os.path.relpath(filename, self.project_root),
+                100.0 * file_covered / file_total, file_covered, file_total)
+        return output + '\n'
+
+    def format_coverage_changes(self):
+        diff = self.coverage_diff
+        if diff is None or not (diff.regressed or diff.gained):
+            return ''
+
+        output = 'Changes since previous run: {} line(s) lost coverage, {} gained\n'.format(
+            sum(len(rows) for rows in diff.regressed.values()),
+            sum(len(rows) for rows in diff.gained.values()))
+        for description, changed_rows in (('lost', diff.regressed), ('gained', diff.gained)):
+            for filename in sorted(changed_rows):
+                rows = changed_rows[filename]
+                lines = ', '.join(str(row + 1) for row in rows[:MAX_CHANGED_LINES_SHOWN])
+                if len(rows) > MAX_CHANGED_LINES_SHOWN:
+                    lines += ', …'
+                output += '  {} {} coverage on {} line(s): {}\n'.format(
+                    os.path.relpath(filename, self.project_root), description, len(rows), lines)
+        return output + '\n'
+
+    def format_project_coverage_compact(self, files, viewport_width, max_filename_length, coverage_length, header=''):
         max_filename_length = max(max_filename_length, viewport_width - coverage_length)
         graph_width = max_filename_length
 
-        output = ''
+        output = header
         graph_regions = [[], [], [], [], [], [], [], [], [], [], []]
         for file in files:
             graph_bar_width = int(file['covered_percent'] / 100.0 * graph_width)
@@ -80,10 +196,10 @@ class ShowProjectRubyCoverage(TextCommand):
 
         return output, graph_regions
 
-    def format_project_coverage_full(self, files, viewport_width, max_filename_length, coverage_length):
+    def format_project_coverage_full(self, files, viewport_width, max_filename_length, coverage_length, header=''):
         graph_width = viewport_width - max_filename_length - coverage_length - 2
 
-        output = ''
+        output = header
         graph_regions = [[], [], [], [], [], [], [], [], [], [], []]
         for file in files:
             graph_bar_width = int(file['covered_percent'] / 100.0 * graph_width)
@@ -0,0 +1,20 @@
+"""
+Import the repository as the `SimpleCov` package, against the stand-in
+`sublime` modules of the benchmark, so tests can import its modules outside
+Sublime Text.
+"""
+
+import os
+import sys
+import types
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = 'SimpleCov'
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'bench', 'stubs'))
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[PACKAGE] = package
@@ -0,0 +1,116 @@
+from SimpleCov.common.patch_coverage import parse_diff, unquote_path
+
+
+def test_added_and_changed_lines():
+    diff = (
+        'diff --git a/app/x.rb b/app/x.rb\n'
+        '--- a/app/x.rb\n'
+        '+++ b/app/x.rb\n'
+        '@@ -3 +3 @@\n'
+        '-old\n'
+        '+new\n'
+        '@@ -10,0 +11,2 @@\n'
+        '+a\n'
+        '+b\n'
+    )
+    assert parse_diff(diff) == {'app/x.rb': [2, 10, 11]}
+
+
+def test_hunk_count_defaults_to_one():
+    diff = '--- a/x\n+++ b/x\n@@ -5 +7 @@\n-q\n+r\n'
+    assert parse_diff(diff) == {'x': [6]}
+
+
+def test_added_lines_that_look_like_headers():
+    diff = (
+        '--- a/x\n'
+        '+++ b/x\n'
+        '@@ -1,0 +2,3 @@\n'
+        '+a\n'
+        '+++ weird\n'
+        '+--- also weird\n'
+        '@@ -10 +12 @@\n'
+        '-q\n'
+        '+r\n'
+    )
+    assert parse_diff(diff) == {'x': [1, 2, 3, 11]}
+
+
+def test_removed_lines_that_look_like_headers():
+    diff = (
+        '--- a/x\n'
+        '+++ b/x\n'
+        '@@ -4,2 +3,0 @@\n'
+        '--- a\n'
+        '-++ b/y\n'
+        '@@ -9 +8 @@\n'
+        '-q\n'
+        '+r\n'
+    )
+    assert parse_diff(diff) == {'x': [7]}
+
+
+def test_deletion_only_hunk_changes_no_rows():
+    diff = '--- a/x\n+++ b/x\n@@ -3,2 +2,0 @@\n-a\n-b\n'
+    assert parse_diff(diff) == {'x': []}
+
+
+def test_no_newline_marker():
+    diff = (
+        '--- a/x\n'
+        '+++ b/x\n'
+        '@@ -1 +1 @@\n'
+        '-a\n'
+        '\\ No newline at end of file\n'
+        '+b\n'
+        '\\ No newline at end of file\n'
+    )
+    assert parse_diff(diff) == {'x': [0]}
+
+
+def test_deleted_file():
+    diff = (
+        'diff --git a/gone b/gone\n'
+        'deleted file mode 100644\n'
+        '--- a/gone\n'
+        '+++ /dev/null\n'
+        '@@ -1,2 +0,0 @@\n'
+        '-+++ b/x\n'
+        '-a\n'
+        '--- a/x\n'
+        '+++ b/x\n'
+        '@@ -1 +1 @@\n'
+        '-a\n'
+        '+b\n'
+    )
+    assert parse_diff(diff) == {'x': [0]}
+
+
+def test_new_file():
+    diff = '--- /dev/null\n+++ b/new\n@@ -0,0 +1,2 @@\n+a\n+b\n'
+    assert parse_diff(diff) == {'new': [0, 1]}
+
+
+def test_multiple_files():
+    diff = (
+        '--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n'
+        '--- a/y\n+++ b/y\n@@ -2,0 +3 @@\n+c\n'
+    )
+    assert parse_diff(diff) == {'x': [0], 'y': [2]}
+
+
+def test_path_with_space_has_trailing_tab():
+    diff = '--- a/my file\t\n+++ b/my file\t\n@@ -1 +1 @@\n-a\n+b\n'
+    assert parse_diff(diff) == {'my file': [0]}
+
+
+def test_quoted_path():
+    diff = '--- "a/caf\\303\\251\\tx"\n+++ "b/caf\\303\\251\\tx"\n@@ -1 +1 @@\n-a\n+b\n'
+    assert parse_diff(diff) == {'café\tx': [0]}
+
+
+def test_unquote_path():
+    assert unquote_path('plain') == 'plain'
+    assert unquote_path('"a\\"b\\\\c"') == 'a"b\\c'
+    assert unquote_path('"\\303\\274ber"') == 'über'
+    assert unquote_path('"') == '"'
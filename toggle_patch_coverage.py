@@ -0,0 +1,17 @@
+import sublime
+import sublime_plugin
+
+SETTINGS_FILE = 'SimpleCov.sublime-settings'
+
+class TogglePatchCoverageCommand(sublime_plugin.ApplicationCommand):
+    """Turn coverage of lines changed since the git base on or off."""
+
+    def is_checked(self):
+        return bool(sublime.load_settings(SETTINGS_FILE).get('patch_coverage'))
+
+    def run(self):
+        settings = sublime.load_settings(SETTINGS_FILE)
+        enabled = not settings.get('patch_coverage')
+        settings.set('patch_coverage', enabled)
+        sublime.save_settings(SETTINGS_FILE)
+        sublime.status_message('SimpleCov patch coverage {}.'.format('enabled' if enabled else 'disabled'))
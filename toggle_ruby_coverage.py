@@ -1,9 +1,35 @@
 import os
+from collections import OrderedDict
 import sublime
 import sublime_plugin
 
 from .common.theme_generator import ThemeGenerator
 from .common.json_coverage_reader import JsonCoverageReader
+from .common.coverage_bands import get_coverage_bands
+from .common.heatmap import MAX_HEAT_LEVELS, get_heat_levels, interpolate_color
+from .common.uncovered_index import find_uncovered_hunks
+from .common.perf import timed
+
+# Region key, background highlight scope, and gutter mode scope and icon of
+# each coverage level.
+COVERAGE_REGIONS = OrderedDict([
+    ('uncovered', ('ruby-coverage-uncovered-lines', 'coverage.uncovered', 'region.redish', 'circle')),
+    ('covered', ('ruby-coverage-covered-lines', 'coverage.covered', 'region.greenish', 'dot')),
+    ('more_covered', ('ruby-coverage-more-covered-lines', 'coverage.covered.more', 'region.greenish', 'dot')),
+    ('most_covered', ('ruby-coverage-most-covered-lines', 'coverage.covered.most', 'region.greenish', 'dot')),
+    ('regressed', ('ruby-coverage-regressed-lines', 'coverage.regressed', 'region.orangish', 'bookmark')),
+    ('gained', ('ruby-coverage-gained-lines', 'coverage.gained', 'region.bluish', 'bookmark')),
+])
+
+# Gutter mode scopes of heat levels, from coolest to hottest.
+HEAT_GUTTER_SCOPES = ['region.bluish', 'region.cyanish', 'region.greenish', 'region.yellowish']
+
+# Gutter mode only draws icons, so needs no color scheme of its own.
+GUTTER_FLAGS = sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE
+
+# Ids of the views whose coverage is shown once their report has loaded.
+if '_loading_views' not in globals():
+    _loading_views = set()
 
 class ToggleRubyCoverageCommand(sublime_plugin.TextCommand):
     """Show/hide coverage of current file based on a previous coverage run."""
@@ -16,88 +42,111 @@ class ToggleRubyCoverageCommand(sublime_plugin.TextCommand):
             return
 
         settings = self.view.settings()
+        if self.view.id() in _loading_views:
+            return
+
         if settings.has('ruby_coverage.visible'):
             self.hide_coverage()
             settings.erase('ruby_coverage.visible')
         else:
             filename = self.get_filename()
             coverage = self.get_coverage(filename)
+            if self.reader.loading:
+                # Shown by `on_report_loaded` once the report is loaded.
+                _loading_views.add(self.view.id())
+                return
+
             self.show_coverage(filename, coverage)
             settings.set('ruby_coverage.visible', True)
             if self.is_auto_scroll_enabled():
-                self.scroll_to_uncovered()
+                self.scroll_to_uncovered(coverage)
 
     def get_filename(self):
         return self.view.file_name()
 
     def get_coverage(self, filename):
-        view = self.view
+        self.reader = JsonCoverageReader(filename, on_loaded=self.on_report_loaded)
+        return self.reader.get_file_coverage(filename)
 
-        r = JsonCoverageReader(filename)
-        coverage = r.get_file_coverage(filename) if r else None
-        return coverage
+    def on_report_loaded(self):
+        _loading_views.discard(self.view.id())
+        self.view.run_command('toggle_ruby_coverage')
 
+    @timed('show_coverage')
     def show_coverage(self, filename, coverage):
         view = self.view
+        gutter = self.is_gutter_mode()
 
-        self.augment_color_scheme()
+        if not gutter:
+            self.augment_color_scheme()
 
         if coverage is None:
-            self.show_no_coverage()
+            self.show_no_coverage(gutter)
             return
 
-        uncovered_regions = []
-        covered_regions = []
-        more_covered_regions = []
-        most_covered_regions = []
-
         coverage_levels = sublime.load_settings("SimpleCov.sublime-settings").get("coverage_levels")
-        current_coverage_regions = None
-        
-        self.reset_coverage_lines()
-
-        for line_number, line_coverage in list(enumerate(coverage['coverage'])):
-            if line_coverage is None:
-                self.add_coverage_line(line_number, None)
-            elif line_coverage >= coverage_levels['most_covered']:
-                self.add_coverage_line(line_number, most_covered_regions)
-            elif line_coverage >= coverage_levels['more_covered']:
-                self.add_coverage_line(line_number, more_covered_regions)
-            elif line_coverage >= coverage_levels['covered']:
-                self.add_coverage_line(line_number, covered_regions)
+        heat_levels = get_heat_levels()
+        bands = get_coverage_bands(self.reader, filename, coverage, coverage_levels, heat_levels)
+
+        for level, (key, scope, gutter_scope, icon) in self.get_coverage_regions(heat_levels).items():
+            if gutter:
+                view.add_regions(key, self.get_line_regions(bands[level]), gutter_scope, icon, GUTTER_FLAGS)
             else:
-                self.add_coverage_line(line_number, uncovered_regions)
+                view.add_regions(key, self.get_band_regions(bands[level]), scope)
 
-        self.add_coverage_line(line_number + 1, None)
+        regressed_lines = sum(end - start + 1 for start, end in bands['regressed'])
+        gained_lines = sum(end - start + 1 for start, end in bands['gained'])
+        if (regressed_lines or gained_lines) and view.window():
+            sublime.status_message('{} lines lost and {} gained coverage since the previous run.'.format(
+                regressed_lines, gained_lines))
 
-        view.add_regions('ruby-coverage-uncovered-lines', uncovered_regions,
-                         'coverage.uncovered')
-        view.add_regions('ruby-coverage-covered-lines', covered_regions,
-                         'coverage.covered')
-        view.add_regions('ruby-coverage-more-covered-lines', more_covered_regions,
-                         'coverage.covered.more')
-        view.add_regions('ruby-coverage-most-covered-lines', most_covered_regions,
-                         'coverage.covered.most')
+    def get_coverage_regions(self, heat_levels=None):
+        """ Like `COVERAGE_REGIONS`, with covered lines split into heat levels if given. """
+        if not heat_levels:
+            return COVERAGE_REGIONS
 
-    def reset_coverage_lines(self):
-        self.current_coverage_regions = None
-        self.current_region_start = None
+        regions = OrderedDict([('uncovered', COVERAGE_REGIONS['uncovered'])])
+        for level in range(heat_levels):
+            regions['heat_{}'.format(level)] = (
+                'ruby-coverage-heat-{}-lines'.format(level),
+                'coverage.covered.heat.{}'.format(level),
+                HEAT_GUTTER_SCOPES[level * len(HEAT_GUTTER_SCOPES) // heat_levels],
+                'dot',
+            )
+        regions['regressed'] = COVERAGE_REGIONS['regressed']
+        regions['gained'] = COVERAGE_REGIONS['gained']
+        return regions
 
-    def add_coverage_line(self, line_number, line_coverage_regions):
+    def get_band_regions(self, bands):
+        """ One region spanning the full lines of each band. """
         view = self.view
-        if self.current_coverage_regions is not line_coverage_regions:
-            if self.current_coverage_regions is not None:
-                current_region_end = view.full_line(view.text_point(line_number - 1, 0)).end()
-                self.current_coverage_regions.append(sublime.Region(self.current_region_start, current_region_end))
-            self.current_region_start = view.text_point(line_number, 0)
-        self.current_coverage_regions = line_coverage_regions
-
-    def show_no_coverage(self):
+        return [
+            sublime.Region(view.text_point(start, 0), view.full_line(view.text_point(end, 0)).end())
+            for start, end in bands
+        ]
+
+    def get_line_regions(self, bands):
+        """ An empty region at the start of each line of each band, for gutter icons. """
         view = self.view
-        view.settings().set('forcecolorcode', False)
-        view.add_regions('ruby-coverage-uncovered-lines',
-                         [sublime.Region(0, view.size())],
-                         'coverage.uncovered')
+        regions = []
+        for start, end in bands:
+            for row in range(start, end + 1):
+                point = view.text_point(row, 0)
+                regions.append(sublime.Region(point, point))
+        return regions
+
+    def is_gutter_mode(self):
+        return sublime.load_settings("SimpleCov.sublime-settings").get("render_mode") == "gutter"
+
+    def show_no_coverage(self, gutter=False):
+        view = self.view
+        key, scope, gutter_scope, icon = COVERAGE_REGIONS['uncovered']
+        if gutter:
+            last_row = view.rowcol(view.size())[0]
+            view.add_regions(key, self.get_line_regions([(0, last_row)]), gutter_scope, icon, GUTTER_FLAGS)
+        else:
+            view.settings().set('forcecolorcode', False)
+            view.add_regions(key, [sublime.Region(0, view.size())], scope)
         if view.window():
              sublime.status_message('No coverage data for this file.')
 
@@ -105,25 +154,26 @@ class ToggleRubyCoverageCommand(sublime_plugin.TextCommand):
         view = self.view
         self.restore_color_scheme()
         view.erase_status('SimpleCov')
-        view.erase_regions('ruby-coverage-uncovered-lines')
-        view.erase_regions('ruby-coverage-covered-lines')
-        view.erase_regions('ruby-coverage-more-covered-lines')
-        view.erase_regions('ruby-coverage-most-covered-lines')
+        for key, _, _, _ in self.get_coverage_regions(MAX_HEAT_LEVELS).values():
+            view.erase_regions(key)
+        for key, _, _, _ in COVERAGE_REGIONS.values():
+            view.erase_regions(key)
 
     def is_auto_scroll_enabled(self):
         settings = sublime.load_settings("SimpleCov.sublime-settings")
         return settings.get("auto_scoll_to_uncovered", False)
 
-    def scroll_to_uncovered(self):
+    def scroll_to_uncovered(self, coverage):
         view = self.view
         regions = view.sel()
         if len(regions) > 1 or regions[0].size() > 0:
             return
 
-        uncovered_lines = view.get_regions('ruby-coverage-uncovered-lines')
-        if uncovered_lines and len(uncovered_lines) > 0:
-            first_uncovered = uncovered_lines[0].a
+        uncovered_starts = find_uncovered_hunks(coverage['coverage'])[0] if coverage else []
+        if not uncovered_starts:
+            return
 
+        first_uncovered = view.text_point(uncovered_starts[0], 0)
         view.sel().clear()
         view.sel().add(sublime.Region(first_uncovered, first_uncovered))
         view.show_at_center(first_uncovered)
@@ -168,6 +218,29 @@ class ToggleRubyCoverageCommand(sublime_plugin.TextCommand):
             background = colors["coverage"]["covered_background_extrabold"],
             foreground = colors["coverage"]["covered_foreground_extrabold"]
             )
+        themeGenerator.add_scoped_style(
+            "SimpleCov Regressed Line",
+            "coverage.regressed",
+            background = colors["coverage"].get("regressed_background", "#D5713E"),
+            foreground = colors["coverage"].get("regressed_foreground", "#F9F9F4")
+            )
+        themeGenerator.add_scoped_style(
+            "SimpleCov Gained Line",
+            "coverage.gained",
+            background = colors["coverage"].get("gained_background", "#3E8AD5"),
+            foreground = colors["coverage"].get("gained_foreground", "#F9F9F4")
+            )
+        heat_levels = get_heat_levels()
+        for level in range(heat_levels or 0):
+            themeGenerator.add_scoped_style(
+                "SimpleCov Covered Line Heat {}".format(level + 1),
+                "coverage.covered.heat.{}".format(level),
+                background = interpolate_color(
+                    colors["coverage"]["covered_background"],
+                    colors["coverage"]["covered_background_extrabold"],
+                    float(level) / (heat_levels - 1)),
+                foreground = colors["coverage"]["covered_foreground"]
+                )
         themeGenerator.apply_new_theme("ruby-coverage-view." + file_ext, view)
 
     def get_filename_ext(self):